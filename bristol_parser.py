@@ -1,11 +1,23 @@
 import re
-import json
-import time
+import sys
+import signal
+import asyncio
 import logging
 from datetime import datetime
+from collections.abc import AsyncIterator
+from pathlib import Path
+from urllib.parse import urlsplit
 
-from pydantic import BaseModel, computed_field
-from playwright.sync_api import sync_playwright, Browser, Page
+from pydantic import BaseModel, TypeAdapter, model_validator
+from pydantic_core import from_json, to_json
+from playwright.async_api import async_playwright, Browser, BrowserContext, Page, Playwright, Route
+
+# Паттерны по HTML страниц (сотни КБ) компилируются google-re2, если он
+# установлен: DFA без backtracking. Совместим с re по используемому API.
+try:
+    import re2 as _html_re
+except ImportError:
+    _html_re = re
 
 
 # ============ CONFIG ============
@@ -16,6 +28,22 @@ class Config:
     TIMEOUT = 60000
     LOOP_ENABLED = False
     LOOP_INTERVAL = 3600
+    DETAIL_CONCURRENCY = 5
+
+    # Статичные данные ЖК (описание и layouts) переиспользуются между запусками
+    CACHE_FILE = "jk_cache.json"
+    CACHE_TTL = 24 * 3600
+
+    # Парсеру нужен только HTML — остальное не загружаем.
+    # Стили не блокируются: от них зависят inner_text() и is_visible().
+    BLOCKED_RESOURCE_TYPES = frozenset({"image", "media", "font"})
+    BLOCKED_HOSTS = (
+        "google-analytics.com",
+        "googletagmanager.com",
+        "doubleclick.net",
+        "mc.yandex.ru",
+        "top-fwz1.mail.ru",
+    )
 
     USER_AGENT = (
         "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
@@ -68,12 +96,13 @@ class Flat(BaseModel):
     year_built: int | None = None
     house_status: str | None = None
     images: list[str] = []
+    price_per_m2: int = 0
 
-    @computed_field
-    @property
-    def price_per_m2(self) -> int:
-        """Цена за квадратный метр"""
-        return int(self.price / self.area) if self.area > 0 else 0
+    @model_validator(mode="after")
+    def _calc_price_per_m2(self) -> "Flat":
+        """Цена за квадратный метр — считается один раз при создании"""
+        self.price_per_m2 = calc_price_per_m2(self.price, self.area)
+        return self
 
 
 class JK(BaseModel):
@@ -106,24 +135,140 @@ class ParseResult(BaseModel):
     parsed_at: datetime
 
 
+class JKCache(BaseModel):
+    """Кэш статичных данных ЖК"""
+    newobject_id: str
+    jk: JK
+    layouts: list[Flat]
+    updated_at: datetime
+
+
+# Валидация списка квартир одним вызовом ядра pydantic
+_FLATS_ADAPTER = TypeAdapter(list[Flat])
+
+
+# ============ REGEX ============
+
+_RE_DIGITS = re.compile(r'(\d+)')
+# Число целиком (fullmatch): '123.0' для int, '2,7 м' для float
+_RE_INT = re.compile(r'([-+]?\d+)(?:\.\d*)?')
+_RE_FLOAT = re.compile(r'([-+]?\d+(?:[.,]\d+)?)(?:\s*м)?')
+_RE_AREA_NUMBER = re.compile(r'([\d,]+)')
+_RE_HOUSE_NAME_SUFFIX = re.compile(r'\s*\([^)]+\)\s*$')
+
+# newobject_id — в порядке приоритета
+_RE_NEWOBJECT_ID = (
+    _html_re.compile(r'newobject%5B0%5D=(\d+)'),
+    _html_re.compile(r'"newobject":\[(\d+)\]'),
+    _html_re.compile(r'newobject_id["\']?:\s*(\d+)'),
+    _html_re.compile(r'"id":(\d+).*?"type":"newobject"'),
+)
+
+# Поля ЖК — одна альтернация, HTML сканируется за один проход.
+# Имя сработавшей ветки доступно через match.lastgroup.
+# Совпадения альтернации не перекрываются, поэтому в неё входят только ветки,
+# которые не могут поглотить чужой якорь: значение до кавычки, число и т.п.
+# В re2 \s — только ASCII, поэтому неразрывный пробел указан явно (\xa0).
+_RE_JK_FIELDS = _html_re.compile(
+    r'"displayName":"(?P<name>[^"]+)"'
+    r'|class="street-address">(?P<address>[^<]+)<'
+    r'|"fromDeveloperMinPrice":(?P<developer_min_price>\d+)'
+    r'|"minPrice":"(?P<min_price>[\d.]+)"'
+    r'|"fromDeveloperMaxPrice":(?P<developer_max_price>\d+)'
+    r'|"maxPrice":"(?P<max_price>[\d.]+)"'
+    r'|"minPriceForMeterFromDeveloperValue":(?P<price_per_m2_min>\d+)'
+    r'|"priceForMeterFromDeveloperDisplay":"[^"]*?(?P<price_per_m2_max>\d[\d\s\xa0]*\d)[\s\xa0]*₽'
+    r'|"completionYear":(?P<year_built>\d{4})'
+    r'|"newbuildingClass":"(?P<building_class>[^"]+)"'
+    r'|"materials":\["(?P<building_type>[^"]+)"'
+    r'|(?P<floors>"floor":\{"minFloors":(?P<min_floors>\d+),"maxFloors":(?P<max_floors>\d+)\})'
+    r'|"shortSpecifications":(?P<specifications>\[)'
+)
+
+# Ветки через [^}]* проходят по вложенному объекту, где могут стоять якоря
+# других полей, — они ищутся отдельно
+_RE_JK_STATUS = _html_re.compile(r'"buildingStatusInfo":\{[^}]*"name":"([^"]+)"')
+_RE_JK_DEVELOPER = _html_re.compile(r'"builders":\[\{"[^}]*"name":"([^"]+)"')
+_RE_JK_PARKING = _html_re.compile(r'"parking":\[\{"[^}]*"title":"([^"]+)"')
+
+# Квартиры
+_RE_FLATS_LAYOUT = _html_re.compile(
+    r'\{"roomCount":"(?P<room_count>[^"]+)","offerUrl":"(?P<url>[^"]+)",'
+    r'"houseName":"(?P<house_name>[^"]+)","finishDate":"(?P<finish_date>[^"]+)",'
+    r'"totalArea":"(?P<area>[^"]+)","priceDisplay":"[^"]+","price":(?P<price>\d+),'
+    r'[^}]*"offerId":(?P<offer_id>\d+),"layoutImageUrl":"(?P<image_url>[^"]+)"\}'
+)
+_RE_VALID_IDS = _html_re.compile(r'"cianId":(\d+)[^}]*?"parentId":(\d+)')
+_RE_FLAT_ID = re.compile(r'/flat/(\d+)')
+
+# Карточка квартиры — площадь, этаж и цена за один проход по тексту
+_RE_CARD = re.compile(
+    r'(?P<area>\d+[,.]?\d*)\s*м²'
+    r'|(?P<floors>(?P<floor>\d+)\s*[/из]+\s*(?P<floors_total>\d+)\s*эт)'
+    r'|(?P<price>[\d\s]+)\s*₽'
+)
+_RE_PRICE_DIGITS = re.compile(r'([\d\s]+)')
+
+# Детальная страница
+_RE_BUILDING_META = _html_re.compile(
+    r'<meta[^>]*name="description"[^>]*content="[^"]*ул\.[\s\xa0]*Шекспира,[\s\xa0]*(\d+к\d+)'
+)
+_RE_BUILDING_TITLE = _html_re.compile(r'<title>[^<]*ул\.[\s\xa0]*Шекспира,[\s\xa0]*(\d+к\d+)')
+_RE_HOUSE_NAME = _html_re.compile(r'"house":\{"id":\d+,"name":"([^"]+)"')
+_RE_PHOTOS = _html_re.compile(r'"photos":\[([^\]]+)\]')
+_RE_PHOTO_URL = _html_re.compile(r'"fullUrl":\s*"([^"]+)"')
+
+
 # ============ HELPERS ============
 
-def decode_url(url: str) -> str:
-    """Декодирование URL из JSON"""
-    return url.replace('\\u002F', '/')
+def decode_json_string(value: str) -> str:
+    """Декодирование строки, вырезанной из JSON (\\u002F, \\u00ab и прочие escape)"""
+    try:
+        return from_json(f'"{value}"'.encode())
+    except ValueError:
+        return value
+
+
+def extract_json_array(text: str, start: int) -> str | None:
+    """JSON-массив, начинающийся с text[start] == '[', с учётом вложенности и строк"""
+    depth = 0
+    in_string = escaped = False
+    for i in range(start, len(text)):
+        char = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "[{":
+            depth += 1
+        elif char in "]}":
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    return None
+
+
+def calc_price_per_m2(price: int, area: float) -> int:
+    """Цена за квадратный метр"""
+    return int(price / area) if area > 0 else 0
 
 
 def parse_rooms(text: str) -> int:
     """Извлечение количества комнат из текста"""
     if "студия" in text.lower():
         return 0
-    match = re.search(r'(\d+)', text)
+    match = _RE_DIGITS.search(text)
     return int(match.group(1)) if match else 0
 
 
 def parse_area(text: str) -> float:
     """Извлечение площади из текста"""
-    match = re.search(r'([\d,]+)', text)
+    match = _RE_AREA_NUMBER.search(text)
     return float(match.group(1).replace(',', '.')) if match else 0.0
 
 
@@ -132,40 +277,81 @@ def parse_building_from_house_name(house_name: str) -> str | None:
     if not house_name or ',' not in house_name:
         return None
     building_part = house_name.split(',', 1)[1].strip()
-    building = re.sub(r'\s*\([^)]+\)\s*$', '', building_part).strip()
+    building = _RE_HOUSE_NAME_SUFFIX.sub('', building_part).strip()
     return building or None
 
 
+# Ключевое слово (casefold) -> канонический статус, в порядке приоритета
+_STATUS_KEYWORDS = (("сдан", "Сдан"), ("строит", "Строится"))
+_CARD_STATUS_KEYWORDS = (("дом сдан", "Сдан"), ("строится", "Строится"))
+
+# Типовые значения статуса целиком — одна проверка по хэшу вместо поиска подстрок
+_STATUS_EXACT = {
+    "сдан": "Сдан",
+    "дом сдан": "Сдан",
+    "строится": "Строится",
+    "дом строится": "Строится",
+}
+
+
+def match_status(folded_text: str, keywords: tuple = _STATUS_KEYWORDS) -> str | None:
+    """Поиск статуса в тексте, уже приведённом через casefold()"""
+    for keyword, status in keywords:
+        if keyword in folded_text:
+            return status
+    return None
+
+
 def normalize_status(status: str | None) -> str | None:
     """Нормализация статуса дома"""
     if not status:
         return None
-    status_lower = status.lower().strip()
-    if "сдан" in status_lower:
-        return "Сдан"
-    if "строит" in status_lower:
-        return "Строится"
-    return status
+    folded = status.casefold().strip()
+    return _STATUS_EXACT.get(folded) or match_status(folded) or status
 
 
 def safe_int(value: str, default: int = 0) -> int:
-    """Безопасное преобразование в int"""
-    try:
-        return int(float(value))
-    except (ValueError, TypeError):
-        return default
+    """Безопасное преобразование в int ('123.0' -> 123)"""
+    match = _RE_INT.fullmatch(value.strip()) if isinstance(value, str) else None
+    return int(match.group(1)) if match else default
 
 
 def safe_float(value: str, default: float = 0.0) -> float:
-    """Безопасное преобразование в float"""
-    try:
-        return float(value.replace(',', '.').replace(' м', ''))
-    except (ValueError, TypeError, AttributeError):
-        return default
+    """Безопасное преобразование в float ('2,7 м' -> 2.7)"""
+    match = _RE_FLOAT.fullmatch(value.strip()) if isinstance(value, str) else None
+    return float(match.group(1).replace(',', '.')) if match else default
 
 
 # ============ PARSER ============
 
+# Страница выдачи готова: отрисованы карточки или сообщение о пустой выдаче
+_FLATS_PAGE_READY_SELECTOR = (
+    '[data-name="LinkArea"], article[data-name="CardComponent"], '
+    'body:has-text("Нет подходящих объявлений")'
+)
+
+# Все карточки страницы за один вызов page.evaluate вместо
+# нескольких query_selector/inner_text на каждую карточку
+_EXTRACT_CARDS_JS = """
+() => {
+    let cards = document.querySelectorAll('[data-name="LinkArea"]');
+    if (!cards.length) {
+        cards = document.querySelectorAll('article[data-name="CardComponent"]');
+    }
+    const text = (el) => (el ? el.innerText : null);
+    return Array.from(cards, (card) => {
+        const link = card.querySelector('a[href*="/flat/"]') || card.querySelector('a[href*="sale/flat"]');
+        return {
+            href: link ? link.getAttribute("href") : null,
+            text: text(card.querySelector('[data-name="LinkArea"]') || card),
+            address: text(card.querySelector('[data-name="AddressItem"]')),
+            price: text(card.querySelector('[data-mark="MainPrice"]')),
+        };
+    });
+}
+"""
+
+
 class BristolParser:
     """Парсер ЖК Бристоль"""
 
@@ -173,25 +359,32 @@ class BristolParser:
         self.config = Config()
         self.newobject_id: str | None = None
         self.flats_url: str | None = None
+        self._pw: Playwright | None = None
+        self._browser: Browser | None = None
+        self._jk_cache: JKCache | None = None
+
+    async def __aenter__(self) -> "BristolParser":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
 
-    def parse(self) -> ParseResult:
+    async def parse(self) -> ParseResult:
         """Основной метод — запускает парсинг и возвращает результат"""
         logger.info("Запуск парсера")
 
-        with sync_playwright() as pw:
-            browser = self._launch_browser(pw)
-            try:
-                page = self._create_page(browser)
-                self._open_jk_page(page)
+        context = await self._create_context(await self._get_browser())
+        try:
+            page = await context.new_page()
+            cache = await self._get_jk_cache(page)
 
-                self.newobject_id = self._extract_newobject_id(page)
-                self.flats_url = self._build_flats_url()
+            self.newobject_id = cache.newobject_id
+            self.flats_url = self._build_flats_url()
 
-                jk = self._parse_jk(page)
-                jk_html = page.content()
-                flats = self._parse_flats(page, jk, jk_html)
-            finally:
-                browser.close()
+            jk = cache.jk
+            flats = await self._parse_flats(context, page, jk, cache.layouts)
+        finally:
+            await context.close()
 
         result = ParseResult(
             jk=jk,
@@ -202,45 +395,121 @@ class BristolParser:
         logger.info(f"Парсинг завершён. Квартир: {result.flats_count}")
         return result
 
+    async def close(self) -> None:
+        """Закрытие браузера и остановка Playwright"""
+        if self._browser is not None:
+            await self._browser.close()
+            self._browser = None
+        if self._pw is not None:
+            await self._pw.stop()
+            self._pw = None
+        logger.info("Браузер закрыт")
+
+    # -------- JK cache --------
+
+    async def _get_jk_cache(self, page: Page) -> JKCache:
+        """Данные ЖК из кэша, а при его отсутствии или устаревании — со страницы"""
+        cache = self._jk_cache or self._load_jk_cache()
+        if cache and self._is_cache_valid(cache):
+            logger.info(f"Данные ЖК из кэша от {cache.updated_at:%Y-%m-%d %H:%M:%S}")
+        else:
+            cache = await self._fetch_jk(page)
+            self._save_jk_cache(cache)
+        self._jk_cache = cache
+        return cache
+
+    def _is_cache_valid(self, cache: JKCache) -> bool:
+        """Кэш собран для текущего JK_URL и не истёк срок его жизни"""
+        if cache.jk.url != self.config.JK_URL:
+            return False
+        return (datetime.now() - cache.updated_at).total_seconds() < self.config.CACHE_TTL
+
+    def _load_jk_cache(self) -> JKCache | None:
+        """Чтение кэша ЖК с диска"""
+        try:
+            return JKCache.model_validate_json(Path(self.config.CACHE_FILE).read_bytes())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Не удалось прочитать кэш ЖК: {e}")
+            return None
+
+    def _save_jk_cache(self, cache: JKCache) -> None:
+        """Запись кэша ЖК на диск"""
+        try:
+            Path(self.config.CACHE_FILE).write_text(cache.model_dump_json(), encoding="utf-8")
+        except OSError as e:
+            logger.warning(f"Не удалось сохранить кэш ЖК: {e}")
+
+    async def _fetch_jk(self, page: Page) -> JKCache:
+        """Загрузка страницы ЖК: newobject_id, данные ЖК и layouts"""
+        await self._open_jk_page(page)
+        jk_html = await page.content()
+
+        self.newobject_id = self._extract_newobject_id(jk_html)
+        jk = self._parse_jk(jk_html)
+
+        layouts = self._extract_flats_from_layouts(jk_html, jk)
+        logger.info(f"Из layouts извлечено: {len(layouts)} квартир")
+
+        return JKCache(
+            newobject_id=self.newobject_id,
+            jk=jk,
+            layouts=layouts,
+            updated_at=datetime.now(),
+        )
+
     # -------- Browser --------
 
-    def _launch_browser(self, pw) -> Browser:
+    async def _get_browser(self) -> Browser:
+        """Браузер, общий для всех запусков parse()"""
+        if self._browser is None or not self._browser.is_connected():
+            if self._pw is None:
+                self._pw = await async_playwright().start()
+            self._browser = await self._launch_browser(self._pw)
+        return self._browser
+
+    async def _launch_browser(self, pw: Playwright) -> Browser:
         """Запуск браузера"""
-        return pw.chromium.launch(
+        return await pw.chromium.launch(
             headless=self.config.HEADLESS,
             args=["--disable-blink-features=AutomationControlled"],
         )
 
-    def _create_page(self, browser: Browser) -> Page:
-        """Создание страницы с контекстом"""
-        context = browser.new_context(
+    async def _create_context(self, browser: Browser) -> BrowserContext:
+        """Создание изолированного контекста на один запуск"""
+        context = await browser.new_context(
             viewport={"width": 1400, "height": 900},
             user_agent=self.config.USER_AGENT,
         )
-        return context.new_page()
-
-    def _open_jk_page(self, page: Page) -> None:
+        await context.route("**/*", self._filter_request)
+        return context
+
+    async def _filter_request(self, route: Route) -> None:
+        """Отсечение медиа, шрифтов и аналитики"""
+        request = route.request
+        host = urlsplit(request.url).hostname or ""
+        if (
+            request.resource_type in self.config.BLOCKED_RESOURCE_TYPES
+            or host.endswith(self.config.BLOCKED_HOSTS)
+        ):
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def _open_jk_page(self, page: Page) -> None:
         """Открытие страницы ЖК"""
         logger.info(f"Открываю страницу: {self.config.JK_URL}")
-        page.goto(self.config.JK_URL, timeout=self.config.TIMEOUT)
-        page.wait_for_load_state("domcontentloaded")
+        await page.goto(self.config.JK_URL, timeout=self.config.TIMEOUT, wait_until="domcontentloaded")
 
     # -------- Extract IDs --------
 
-    def _extract_newobject_id(self, page: Page) -> str:
+    def _extract_newobject_id(self, html: str) -> str:
         """Извлечение newobject_id из HTML"""
         logger.info("Ищу newobject_id")
-        html = page.content()
 
-        patterns = [
-            r'newobject%5B0%5D=(\d+)',
-            r'"newobject":\[(\d+)\]',
-            r'newobject_id["\']?:\s*(\d+)',
-            r'"id":(\d+).*?"type":"newobject"',
-        ]
-
-        for pattern in patterns:
-            match = re.search(pattern, html)
+        for pattern in _RE_NEWOBJECT_ID:
+            match = pattern.search(html)
             if match:
                 newobject_id = match.group(1)
                 logger.info(f"newobject_id: {newobject_id}")
@@ -258,12 +527,15 @@ class BristolParser:
         logger.info(f"URL квартир: {url}")
         return url
 
+    def _build_flats_page_url(self, page_num: int) -> str:
+        """URL конкретной страницы выдачи"""
+        return self.flats_url if page_num == 1 else f"{self.flats_url}&p={page_num}"
+
     # -------- Parse JK --------
 
-    def _parse_jk(self, page: Page) -> JK:
+    def _parse_jk(self, html: str) -> JK:
         """Парсинг данных о ЖК"""
         logger.info("Парсинг данных ЖК")
-        html = page.content()
 
         jk_data = {
             "id": self.newobject_id,
@@ -271,169 +543,219 @@ class BristolParser:
             "url": self.config.JK_URL,
         }
         jk_data.update(self._extract_jk_fields(html))
-        return JK(**jk_data)
+        return JK.model_validate(jk_data)
 
     def _extract_jk_fields(self, html: str) -> dict:
         """Извлечение полей ЖК из HTML"""
+        # Первое совпадение каждой ветки альтернации
+        found = {}
+        for match in _RE_JK_FIELDS.finditer(html):
+            found.setdefault(match.lastgroup, match)
+
         data = {}
 
         # Название
-        if match := re.search(r'"displayName":"([^"]+)"', html):
-            data["name"] = match.group(1).replace("\\u00ab", "«").replace("\\u00bb", "»")
+        if match := found.get("name"):
+            data["name"] = decode_json_string(match["name"])
 
         # Статус
-        if match := re.search(r'"buildingStatusInfo":\{[^}]*"name":"([^"]+)"', html):
+        if match := _RE_JK_STATUS.search(html):
             data["status"] = normalize_status(match.group(1))
 
         # Адрес
-        if match := re.search(r'class="street-address">([^<]+)<', html):
-            data["address"] = match.group(1)
+        if match := found.get("address"):
+            data["address"] = match["address"]
 
         # Застройщик
-        if match := re.search(r'"builders":\[\{"[^}]*"name":"([^"]+)"', html):
+        if match := _RE_JK_DEVELOPER.search(html):
             data["developer"] = match.group(1)
 
         # Цены от застройщика
-        if match := re.search(r'"fromDeveloperMinPrice":(\d+)', html):
-            data["price_min"] = int(match.group(1))
-        elif match := re.search(r'"minPrice":"([\d.]+)"', html):
-            data["price_min"] = safe_int(match.group(1))
+        if match := found.get("developer_min_price"):
+            data["price_min"] = int(match["developer_min_price"])
+        elif match := found.get("min_price"):
+            data["price_min"] = safe_int(match["min_price"])
 
-        if match := re.search(r'"fromDeveloperMaxPrice":(\d+)', html):
-            data["price_max"] = int(match.group(1))
-        elif match := re.search(r'"maxPrice":"([\d.]+)"', html):
-            data["price_max"] = safe_int(match.group(1))
+        if match := found.get("developer_max_price"):
+            data["price_max"] = int(match["developer_max_price"])
+        elif match := found.get("max_price"):
+            data["price_max"] = safe_int(match["max_price"])
 
         # Цена за м²
-        if match := re.search(r'"minPriceForMeterFromDeveloperValue":(\d+)', html):
-            data["price_per_m2_min"] = int(match.group(1))
+        if match := found.get("price_per_m2_min"):
+            data["price_per_m2_min"] = int(match["price_per_m2_min"])
 
-        if match := re.search(r'"priceForMeterFromDeveloperDisplay":"[^"]*?(\d[\d\s]*\d)\s*₽', html):
-            price_str = match.group(1).replace(' ', '').replace('\\u00a0', '')
+        if match := found.get("price_per_m2_max"):
+            price_str = match["price_per_m2_max"].replace(' ', '').replace('\xa0', '')
             data["price_per_m2_max"] = safe_int(price_str)
 
         # Год сдачи
-        if match := re.search(r'"completionYear":(\d{4})', html):
-            data["year_built"] = int(match.group(1))
+        if match := found.get("year_built"):
+            data["year_built"] = int(match["year_built"])
 
         # Класс
-        if match := re.search(r'"newbuildingClass":"([^"]+)"', html):
-            data["building_class"] = match.group(1)
+        if match := found.get("building_class"):
+            data["building_class"] = match["building_class"]
 
         # Тип дома
-        if match := re.search(r'"materials":\["([^"]+)"', html):
-            data["building_type"] = match.group(1).capitalize()
+        if match := found.get("building_type"):
+            data["building_type"] = match["building_type"].capitalize()
 
         # Этажность
-        if match := re.search(r'"floor":\{"minFloors":(\d+),"maxFloors":(\d+)\}', html):
-            min_f, max_f = match.group(1), match.group(2)
+        if match := found.get("floors"):
+            min_f, max_f = match["min_floors"], match["max_floors"]
             data["floors"] = f"{min_f}-{max_f}" if min_f != max_f else min_f
 
         # Спецификации
-        if specs_match := re.search(r'"shortSpecifications":\[(.+?)\]', html):
-            specs = specs_match.group(1)
-
-            if match := re.search(r'"title":"Корпуса","value":"(\d+)"', specs):
-                data["buildings_count"] = int(match.group(1))
-
-            if match := re.search(r'"title":"Отделка","value":"([^"]+)"', specs):
-                data["finishing"] = match.group(1)
-
-            if match := re.search(r'"title":"Потолки","value":"([^"]+)"', specs):
-                data["ceiling_height"] = safe_float(match.group(1))
+        if match := found.get("specifications"):
+            # Ветка заканчивается на '[' (re2 не принимает имя группы в start())
+            specs_json = extract_json_array(html, match.end() - 1)
+            if specs_json:
+                data.update(self._parse_specifications(specs_json))
+            else:
+                logger.warning("Массив shortSpecifications не закрыт")
 
         # Парковка
-        if match := re.search(r'"parking":\[\{"[^}]*"title":"([^"]+)"', html):
+        if match := _RE_JK_PARKING.search(html):
             data["parking"] = match.group(1)
 
         return data
 
+    def _parse_specifications(self, specs_json: str) -> dict:
+        """Разбор JSON-массива shortSpecifications"""
+        try:
+            specs = from_json(specs_json.encode(), cache_strings="keys")
+        except ValueError as e:
+            logger.warning(f"Не удалось разобрать shortSpecifications: {e}")
+            return {}
+
+        values = {
+            spec.get("title"): spec.get("value")
+            for spec in specs
+            if isinstance(spec, dict) and isinstance(spec.get("value"), str)
+        }
+
+        data = {}
+        if (value := values.get("Корпуса")) and value.isdigit():
+            data["buildings_count"] = value
+        if value := values.get("Отделка"):
+            data["finishing"] = value
+        if value := values.get("Потолки"):
+            data["ceiling_height"] = safe_float(value)
+        return data
+
     # -------- Parse Flats --------
 
-    def _parse_flats(self, page: Page, jk: JK, jk_html: str) -> list[Flat]:
+    async def _parse_flats(
+        self, context: BrowserContext, page: Page, jk: JK, layouts_flats: list[Flat]
+    ) -> list[Flat]:
         """Парсинг списка квартир"""
         logger.info("Парсинг квартир")
-
-        layouts_flats = self._extract_flats_from_layouts(jk_html, jk)
         layouts_by_id = {f.id: f for f in layouts_flats}
-        logger.info(f"Из layouts извлечено: {len(layouts_flats)} квартир")
 
-        page.goto(self.flats_url, timeout=self.config.TIMEOUT)
-        page.wait_for_load_state("networkidle")
-
-        if "Нет подходящих объявлений" in page.content():
+        html = await self._open_flats_page(page, 1)
+        if "Нет подходящих объявлений" in html:
             logger.warning("Объявления не найдены, возвращаем layouts")
             return layouts_flats
 
+        # Пагинация и детальный парсинг идут одновременно: первые квартиры
+        # обогащаются, пока загружаются следующие страницы выдачи
+        queue: asyncio.Queue[tuple[int, Flat] | None] = asyncio.Queue()
+        workers = []
+        for _ in range(self.config.DETAIL_CONCURRENCY):
+            detail_page = await context.new_page()
+            workers.append(asyncio.create_task(self._enrich_worker(detail_page, queue, jk)))
+
         flats = []
+        try:
+            async for flat in self._iter_flats(page, html, jk, layouts_by_id):
+                flats.append(flat)
+                queue.put_nowait((len(flats), flat))
+
+            logger.info(f"Выдача собрана: {len(flats)} квартир, ждём детальный парсинг")
+            for _ in workers:
+                queue.put_nowait(None)
+            await asyncio.gather(*workers)
+        finally:
+            for worker in workers:
+                worker.cancel()
+
+        logger.info(f"Всего квартир: {len(flats)}")
+        return flats
+
+    async def _iter_flats(self, page: Page, html: str, jk: JK, layouts_by_id: dict) -> AsyncIterator[Flat]:
+        """Квартиры из выдачи по мере обхода её страниц"""
+        seen_ids = set()
         page_num = 1
         max_pages = 50
 
         while page_num <= max_pages:
             logger.info(f"Парсинг страницы {page_num}")
-            page_flats = self._parse_flats_page(page, jk, layouts_by_id)
-            flats.extend(page_flats)
-
-            next_btn = page.query_selector('[data-name="Pagination"] [class*="next"], a[rel="next"]')
-            if not next_btn or not next_btn.is_visible():
+            for flat in await self._parse_flats_page(page, html, jk, layouts_by_id):
+                # За последней страницей Cian может снова отдать уже виденную выдачу
+                if flat.id not in seen_ids:
+                    seen_ids.add(flat.id)
+                    yield flat
+
+            next_btn = await page.query_selector('[data-name="Pagination"] [class*="next"], a[rel="next"]')
+            if not next_btn or not await next_btn.is_visible():
                 break
 
-            next_btn.click()
-            page.wait_for_load_state("networkidle")
+            # Страницы выдачи адресуются параметром p — переходим по URL, без клика
             page_num += 1
+            html = await self._open_flats_page(page, page_num)
+
+    async def _open_flats_page(self, page: Page, page_num: int) -> str:
+        """Переход на страницу выдачи и ожидание карточек; возвращает HTML"""
+        await page.goto(
+            self._build_flats_page_url(page_num),
+            timeout=self.config.TIMEOUT,
+            wait_until="domcontentloaded",
+        )
+        await page.wait_for_selector(_FLATS_PAGE_READY_SELECTOR, timeout=self.config.TIMEOUT)
+        return await page.content()
 
-        logger.info(f"Детальный парсинг {len(flats)} квартир...")
-        for i, flat in enumerate(flats):
+    async def _enrich_worker(self, page: Page, queue: asyncio.Queue, jk: JK) -> None:
+        """Детальный парсинг квартир из очереди на своей вкладке; None — конец очереди"""
+        while (item := await queue.get()) is not None:
+            num, flat = item
             try:
-                self._enrich_flat_details(page, flat, jk)
-                logger.info(f"  [{i+1}/{len(flats)}] {flat.id}: {flat.address}")
+                await self._enrich_flat_details(page, flat, jk)
+                logger.info(f"  [{num}] {flat.id}: {flat.address}")
             except Exception as e:
-                logger.warning(f"  [{i+1}/{len(flats)}] {flat.id}: ошибка - {e}")
-
-        logger.info(f"Всего квартир: {len(flats)}")
-        return flats
+                logger.warning(f"  [{num}] {flat.id}: ошибка - {e}")
 
     def _extract_flats_from_layouts(self, html: str, jk: JK) -> list[Flat]:
         """Извлечение квартир из layouts JSON"""
-        pattern = (
-            r'\{"roomCount":"([^"]+)","offerUrl":"([^"]+)","houseName":"([^"]+)",'
-            r'"finishDate":"([^"]+)","totalArea":"([^"]+)","priceDisplay":"[^"]+",'
-            r'"price":(\d+),[^}]*"offerId":(\d+),"layoutImageUrl":"([^"]+)"\}'
-        )
-
-        flats = []
-        for match in re.findall(pattern, html):
-            room_count, url, house_name, finish_date, area_str, price, offer_id, image_url = match
+        rows = []
+        for match in _RE_FLATS_LAYOUT.finditer(html):
+            layout = match.groupdict()
 
-            building = parse_building_from_house_name(house_name)
+            building = parse_building_from_house_name(layout["house_name"])
             address = f"{jk.address}, {building}" if building else jk.address
 
-            flat = Flat(
-                id=offer_id,
-                url=decode_url(url),
-                rooms=parse_rooms(room_count),
-                area=parse_area(area_str),
-                floor=0,
-                floors_total=0,
-                price=int(price),
-                address=address,
-                year_built=jk.year_built,
-                house_status=finish_date,
-                images=[decode_url(image_url)] if image_url else [],
-            )
-            flats.append(flat)
-
-        return flats
-
-    def _parse_flats_page(self, page: Page, jk: JK, layouts_by_id: dict) -> list[Flat]:
+            rows.append({
+                "id": layout["offer_id"],
+                "url": decode_json_string(layout["url"]),
+                "rooms": parse_rooms(layout["room_count"]),
+                "area": parse_area(layout["area"]),
+                "floor": 0,
+                "floors_total": 0,
+                "price": layout["price"],
+                "address": address,
+                "year_built": jk.year_built,
+                "house_status": layout["finish_date"],
+                "images": [decode_json_string(layout["image_url"])] if layout["image_url"] else [],
+            })
+
+        return _FLATS_ADAPTER.validate_python(rows)
+
+    async def _parse_flats_page(self, page: Page, html: str, jk: JK, layouts_by_id: dict) -> list[Flat]:
         """Парсинг квартир на одной странице"""
-        html = page.content()
         valid_ids = self._extract_valid_flat_ids(html, jk.id)
         logger.info(f"Квартир этого ЖК: {len(valid_ids)}")
 
-        cards = page.query_selector_all('[data-name="LinkArea"]')
-        if not cards:
-            cards = page.query_selector_all('article[data-name="CardComponent"]')
+        cards = await page.evaluate(_EXTRACT_CARDS_JS)
         logger.info(f"Найдено карточек: {len(cards)}")
 
         flats = []
@@ -445,17 +767,19 @@ class BristolParser:
 
     def _extract_valid_flat_ids(self, html: str, jk_id: str) -> set:
         """ID квартир, принадлежащих этому ЖК"""
-        pattern = r'"cianId":(\d+)[^}]*?"parentId":(\d+)'
-        return {cian_id for cian_id, parent_id in re.findall(pattern, html) if parent_id == jk_id}
+        return {
+            match.group(1) for match in _RE_VALID_IDS.finditer(html)
+            if match.group(2) == jk_id
+        }
 
-    def _parse_flat_card(self, card, jk: JK, layouts_by_id: dict, valid_ids: set) -> Flat | None:
+    def _parse_flat_card(self, card: dict, jk: JK, layouts_by_id: dict, valid_ids: set) -> Flat | None:
         """Парсинг одной карточки квартиры"""
         try:
-            url, flat_id = self._extract_flat_url_and_id(card)
+            url, flat_id = self._extract_flat_url_and_id(card["href"])
             if not flat_id or (valid_ids and flat_id not in valid_ids):
                 return None
 
-            title_text = self._get_card_text(card)
+            title_text = card["text"] or ""
             rooms, area, floor, floors_total, price = self._parse_card_data(card, title_text)
 
             if area == 0 or price == 0:
@@ -466,7 +790,8 @@ class BristolParser:
                 card, title_text, layout, jk
             )
 
-            return Flat(
+            # Все поля уже приведены к нужным типам — валидация не нужна
+            return Flat.model_construct(
                 id=flat_id,
                 url=url,
                 rooms=rooms,
@@ -478,84 +803,75 @@ class BristolParser:
                 year_built=year_built,
                 house_status=house_status,
                 images=images,
+                # model_construct не вызывает валидаторы
+                price_per_m2=calc_price_per_m2(price, area),
             )
         except Exception as e:
             logger.debug(f"Ошибка парсинга карточки: {e}")
             return None
 
-    def _extract_flat_url_and_id(self, card) -> tuple[str, str]:
-        """Извлечение URL и ID квартиры из карточки"""
-        link = card.query_selector('a[href*="/flat/"]') or card.query_selector('a[href*="sale/flat"]')
-        if not link:
+    def _extract_flat_url_and_id(self, href: str | None) -> tuple[str, str]:
+        """Извлечение URL и ID квартиры из ссылки карточки"""
+        if not href:
             return "", ""
 
-        url = link.get_attribute("href") or ""
+        url = href
         if url.startswith("/"):
             url = f"https://www.cian.ru{url}"
 
-        match = re.search(r'/flat/(\d+)', url)
+        match = _RE_FLAT_ID.search(url)
         return url, match.group(1) if match else ""
 
-    def _get_card_text(self, card) -> str:
-        """Получение текста карточки"""
-        title_el = card.query_selector('[data-name="LinkArea"]') or card
-        return title_el.inner_text() if title_el else ""
-
-    def _parse_card_data(self, card, text: str) -> tuple[int, float, int, int, int]:
+    def _parse_card_data(self, card: dict, text: str) -> tuple[int, float, int, int, int]:
         """Парсинг основных данных из карточки"""
         rooms = parse_rooms(text)
 
+        found = {}
+        for match in _RE_CARD.finditer(text.replace('\u00a0', ' ')):
+            found.setdefault(match.lastgroup, match)
+
         area = 0.0
-        if match := re.search(r'(\d+[,.]?\d*)\s*м²', text):
-            area = float(match.group(1).replace(',', '.'))
+        if match := found.get("area"):
+            area = float(match["area"].replace(',', '.'))
 
         floor = floors_total = 0
-        if match := re.search(r'(\d+)\s*[/из]+\s*(\d+)\s*эт', text):
-            floor, floors_total = int(match.group(1)), int(match.group(2))
+        if match := found.get("floors"):
+            floor, floors_total = int(match["floor"]), int(match["floors_total"])
 
-        price = self._parse_price(card, text)
+        price = self._parse_price(card, found.get("price"))
         return rooms, area, floor, floors_total, price
 
-    def _parse_price(self, card, text: str) -> int:
+    def _parse_price(self, card: dict, match: re.Match | None) -> int:
         """Извлечение цены"""
-        text = text.replace('\u00a0', ' ')
-        if match := re.search(r'([\d\s]+)\s*₽', text):
-            price_str = match.group(1).replace(' ', '')
+        if match:
+            price_str = match["price"].replace(' ', '')
             if price_str.isdigit():
                 return int(price_str)
 
-        price_el = card.query_selector('[data-mark="MainPrice"]')
-        if price_el:
-            price_text = price_el.inner_text().replace('\u00a0', ' ')
-            if match := re.search(r'([\d\s]+)', price_text):
+        if card["price"]:
+            price_text = card["price"].replace('\u00a0', ' ')
+            if match := _RE_PRICE_DIGITS.search(price_text):
                 price_str = match.group(1).replace(' ', '')
                 if price_str.isdigit():
                     return int(price_str)
         return 0
 
-    def _merge_with_layout(self, card, text: str, layout: Flat | None, jk: JK) -> tuple:
+    def _merge_with_layout(self, card: dict, text: str, layout: Flat | None, jk: JK) -> tuple:
         """Объединение данных карточки с данными из layouts"""
         # Адрес
         address = None
-        if addr_el := card.query_selector('[data-name="AddressItem"]'):
-            address = addr_el.inner_text().strip()
+        if card["address"]:
+            address = card["address"].strip()
         if not address and layout:
             address = layout.address
         if not address:
             address = jk.address
 
-        # Статус
-        house_status = None
-        text_lower = text.lower()
-        if "дом сдан" in text_lower:
-            house_status = "Сдан"
-        elif "строится" in text_lower:
-            house_status = "Строится"
-        if not house_status and layout:
-            house_status = layout.house_status
+        # Статус: найденный в тексте карточки уже канонический
+        house_status = match_status(text.casefold(), _CARD_STATUS_KEYWORDS)
         if not house_status:
-            house_status = jk.status
-        house_status = normalize_status(house_status)
+            fallback = layout.house_status if layout and layout.house_status else jk.status
+            house_status = normalize_status(fallback)
 
         # Изображения и год
         images = layout.images if layout else []
@@ -563,63 +879,80 @@ class BristolParser:
 
         return address, house_status, images, year_built
 
-    def _enrich_flat_details(self, page: Page, flat: Flat, jk: JK) -> None:
+    async def _enrich_flat_details(self, page: Page, flat: Flat, jk: JK) -> None:
         """Загрузка детальной страницы квартиры"""
-        page.goto(flat.url, timeout=self.config.TIMEOUT)
-        page.wait_for_load_state("networkidle")
-        html = page.content()
+        # networkidle ждёт затихания рекламы и аналитики; нужные данные есть уже в HTML
+        await page.goto(flat.url, timeout=self.config.TIMEOUT, wait_until="domcontentloaded")
+        html = await page.content()
 
         # Адрес из разных источников
         building = None
-        for pattern in [
-            r'<meta[^>]*name="description"[^>]*content="[^"]*ул\.\s*Шекспира,\s*(\d+к\d+)',
-            r'<title>[^<]*ул\.\s*Шекспира,\s*(\d+к\d+)',
-        ]:
-            if match := re.search(pattern, html):
+        for pattern in (_RE_BUILDING_META, _RE_BUILDING_TITLE):
+            if match := pattern.search(html):
                 building = match.group(1)
                 break
 
         if not building:
-            if match := re.search(r'"house":\{"id":\d+,"name":"([^"]+)"', html):
+            if match := _RE_HOUSE_NAME.search(html):
                 building = parse_building_from_house_name(match.group(1))
 
         if building:
             flat.address = f"{jk.address}, {building}"
 
         # Фото
-        if match := re.search(r'"photos":\[([^\]]+)\]', html):
-            urls = re.findall(r'"fullUrl":\s*"([^"]+)"', match.group(1))
+        if match := _RE_PHOTOS.search(html):
+            urls = _RE_PHOTO_URL.findall(match.group(1))
             if urls:
-                flat.images = [decode_url(u) for u in urls]
+                flat.images = [decode_json_string(u) for u in urls]
 
 
 # ============ MAIN ============
 
-def main() -> dict:
+async def _parse_once() -> ParseResult:
+    """Однократный запуск парсера"""
+    async with BristolParser() as parser:
+        return await parser.parse()
+
+
+def main() -> ParseResult:
     """Запуск парсера"""
-    parser = BristolParser()
-    result = parser.parse()
-    return result.model_dump(mode="json")
+    return asyncio.run(_parse_once())
+
+
+async def _run_loop(config: Config) -> None:
+    """Цикл парсинга с одним браузером на все итерации"""
+    # SIGTERM отменяет только эту задачу: соединение с Playwright остаётся
+    # живым, и __aexit__ успевает закрыть браузер
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+    except NotImplementedError:
+        pass  # Windows: обработчики сигналов в цикле событий не поддерживаются
+
+    async with BristolParser() as parser:
+        while True:
+            try:
+                result = await parser.parse()
+                logger.info(f"Данные получены: {result.flats_count} квартир")
+            except Exception as e:
+                logger.error(f"Ошибка: {e}")
+
+            logger.info(f"Следующий запуск через {config.LOOP_INTERVAL} сек")
+            await asyncio.sleep(config.LOOP_INTERVAL)
 
 
 def run_loop() -> None:
     """Запуск в цикле"""
     config = Config()
     logger.info(f"Запуск в цикле. Интервал: {config.LOOP_INTERVAL} сек")
-
-    while True:
-        try:
-            data = main()
-            logger.info(f"Данные получены: {data['flats_count']} квартир")
-        except Exception as e:
-            logger.error(f"Ошибка: {e}")
-
-        logger.info(f"Следующий запуск через {config.LOOP_INTERVAL} сек")
-        time.sleep(config.LOOP_INTERVAL)
+    try:
+        asyncio.run(_run_loop(config))
+    except asyncio.CancelledError:
+        logger.info("Получен SIGTERM, парсер остановлен")
 
 
 if __name__ == "__main__":
     if Config.LOOP_ENABLED:
         run_loop()
     else:
-        print(json.dumps(main(), ensure_ascii=False, indent=2))
+        # Байты UTF-8 прямо из pydantic-core, без промежуточного str
+        sys.stdout.buffer.write(to_json(main(), indent=2) + b"\n")